@@ -0,0 +1,172 @@
+"""Index des marges cumulées par match.
+
+Ce module interroge la table dérivée `team_game_margins`, qui stocke pour
+chaque match et chaque équipe la marge cumulée en fin de période (tableau JSON
+d'entiers), la marge finale ainsi que la plus grande avance et le plus grand
+retard. Elle est indexée par équipe, ce qui permet de répondre aux questions
+de remontée, de matchs serrés ou de larges défaites (badges OVERTURNER,
+RESISTANT, CLUTCH) par une simple requête d'intervalle.
+
+La table est maintenue par des triggers sur `games` et `game_quarters` (voir
+`schema.sql`) : toute écriture de l'ingestion reconstruit les lignes du match
+concerné dans la même transaction. `build_game_margins` ne sert qu'à remplir
+l'index pour les matchs enregistrés avant la création des triggers.
+"""
+
+import json
+import sqlite3
+from typing import Dict, Any, Iterable, List, Optional
+
+
+def decode_margins(period_margins: str) -> List[int]:
+    """Décode le tableau des marges cumulées d'un match.
+
+    Args:
+        period_margins: Tableau JSON stocké dans `team_game_margins`
+
+    Returns:
+        Marges cumulées en fin de chaque période
+    """
+    return json.loads(period_margins)
+
+
+def build_game_margins(conn: sqlite3.Connection, game_ids: Optional[Iterable[int]] = None,
+                       seasons: Optional[Iterable[str]] = None) -> int:
+    """Remplit l'index des marges pour des matchs déjà enregistrés.
+
+    Les écritures ultérieures sont prises en charge par les triggers ; cette
+    fonction sert au rattrapage des bases existantes.
+
+    Args:
+        conn: Connexion SQLite en écriture
+        game_ids: Matchs à indexer (optionnel)
+        seasons: Saisons à indexer (optionnel, tous les matchs si aucun filtre)
+
+    Returns:
+        Nombre de matchs indexés
+    """
+    query = """
+        INSERT OR REPLACE INTO team_game_margins
+            (team_id, game_id, opponent_id, is_home, season, date,
+             period_margins, final_margin, max_lead, max_deficit)
+        SELECT team_id, game_id, opponent_id, is_home, season, date,
+               period_margins, final_margin, max_lead, max_deficit
+        FROM team_game_margins_source
+        WHERE 1 = 1
+    """
+    params: List[Any] = []
+    if game_ids is not None:
+        query += " AND game_id IN (SELECT value FROM json_each(?))"
+        params.append(json.dumps(list(game_ids)))
+    if seasons is not None:
+        query += " AND season IN (SELECT value FROM json_each(?))"
+        params.append(json.dumps(list(seasons)))
+
+    with conn:
+        rows = conn.execute(query, params).rowcount
+    # Deux lignes par match (équipe à domicile et visiteuse)
+    return rows // 2
+
+
+def _row_to_dict(row: tuple) -> Dict[str, Any]:
+    """Convertit une ligne de `team_game_margins` en dictionnaire."""
+    return {
+        'game_id': row[0],
+        'opponent_id': row[1],
+        'is_home': bool(row[2]),
+        'season': row[3],
+        'date': row[4],
+        'period_margins': decode_margins(row[5]),
+        'final_margin': row[6],
+        'max_lead': row[7],
+        'max_deficit': row[8]
+    }
+
+
+_SELECT_COLUMNS = """
+    SELECT game_id, opponent_id, is_home, season, date, period_margins,
+           final_margin, max_lead, max_deficit
+    FROM team_game_margins
+"""
+
+
+def get_comeback_games(conn: sqlite3.Connection, team_id: int, min_deficit: int,
+                       won_only: bool = True, season: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Récupère les matchs où une équipe a été menée d'au moins `min_deficit` points.
+
+    Args:
+        conn: Connexion SQLite
+        team_id: Identifiant de l'équipe
+        min_deficit: Retard minimal en fin de période
+        won_only: Ne retenir que les matchs finalement gagnés
+        season: Saison concernée (optionnel)
+
+    Returns:
+        Liste des matchs avec leur chronologie de marges
+    """
+    query = _SELECT_COLUMNS + " WHERE team_id = ? AND max_deficit >= ?"
+    params: List[Any] = [team_id, min_deficit]
+    if won_only:
+        query += " AND final_margin > 0"
+    if season is not None:
+        query += " AND season = ?"
+        params.append(season)
+    query += " ORDER BY max_deficit DESC"
+    return [_row_to_dict(row) for row in conn.execute(query, params)]
+
+
+def get_close_games(conn: sqlite3.Connection, team_id: int, max_margin: int,
+                    season: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Récupère les matchs d'une équipe terminés avec un écart d'au plus `max_margin` points.
+
+    Args:
+        conn: Connexion SQLite
+        team_id: Identifiant de l'équipe
+        max_margin: Écart final maximal
+        season: Saison concernée (optionnel)
+
+    Returns:
+        Liste des matchs avec leur chronologie de marges
+    """
+    query = _SELECT_COLUMNS + " WHERE team_id = ? AND final_margin BETWEEN ? AND ?"
+    params: List[Any] = [team_id, -max_margin, max_margin]
+    if season is not None:
+        query += " AND season = ?"
+        params.append(season)
+    query += " ORDER BY date DESC"
+    return [_row_to_dict(row) for row in conn.execute(query, params)]
+
+
+def get_margin_summary(conn: sqlite3.Connection, team_id: int, season: Optional[str] = None,
+                       comeback_deficit: int = 10) -> Dict[str, Any]:
+    """Agrège les marges d'une équipe (remontées, pire défaite) en une requête.
+
+    Args:
+        conn: Connexion SQLite
+        team_id: Identifiant de l'équipe
+        season: Saison concernée (optionnel)
+        comeback_deficit: Retard définissant une situation de remontée
+
+    Returns:
+        Dictionnaire avec le nombre de matchs, de situations de retard,
+        de remontées gagnantes et la marge de la pire défaite
+    """
+    query = """
+        SELECT COUNT(*),
+               COALESCE(SUM(max_deficit >= ?), 0),
+               COALESCE(SUM(max_deficit >= ? AND final_margin > 0), 0),
+               MIN(final_margin)
+        FROM team_game_margins
+        WHERE team_id = ?
+    """
+    params: List[Any] = [comeback_deficit, comeback_deficit, team_id]
+    if season is not None:
+        query += " AND season = ?"
+        params.append(season)
+    games, trailed, comebacks, worst_margin = conn.execute(query, params).fetchone()
+    return {
+        'games': games,
+        'trailed_games': trailed,
+        'comeback_wins': comebacks,
+        'worst_loss': max(0, -worst_margin) if worst_margin is not None else 0
+    }
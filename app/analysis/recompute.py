@@ -0,0 +1,439 @@
+"""Recalcul historique multi-saisons des données dérivées.
+
+Ce module reconstruit, en dehors de tout contexte Flask, les profils par
+quart-temps, les badges par saison et le backtest des prédictions. Le travail
+est découpé par saison et par équipe puis réparti sur un pool de processus :
+chaque worker ouvre sa propre connexion SQLite en lecture seule et renvoie des
+résultats sérialisables, qui sont fusionnés et écrits par un unique écrivain
+dans le processus principal.
+
+Utilisation :
+    python -m app.analysis.recompute --database instance/momentrix.db \\
+        --seasons 2022 2023 --workers 16
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.analysis.margins import build_game_margins, get_close_games, get_margin_summary
+
+logger = logging.getLogger(__name__)
+
+# Schéma de la base (toutes les instructions sont idempotentes)
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'schema.sql')
+
+# Écart final maximal d'un match serré et nombre minimal de matchs serrés pour CLUTCH
+CLOSE_GAME_MARGIN = 5
+CLUTCH_MIN_GAMES = 3
+
+# Connexion en lecture seule propre à chaque processus worker
+_worker_conn: Optional[sqlite3.Connection] = None
+
+
+def apply_schema(db_path: str) -> None:
+    """Applique `schema.sql` pour créer les tables dérivées absentes.
+
+    Les bases créées avant le recalcul historique ne disposent pas des tables
+    `season_*` ni de l'index des marges.
+
+    Args:
+        db_path: Chemin du fichier de base de données
+    """
+    with open(SCHEMA_PATH, encoding='utf-8') as schema_file:
+        schema = schema_file.read()
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(schema)
+    finally:
+        conn.close()
+
+
+def open_readonly_connection(db_path: str) -> sqlite3.Connection:
+    """Ouvre une connexion SQLite en lecture seule.
+
+    Args:
+        db_path: Chemin du fichier de base de données
+
+    Returns:
+        Connexion SQLite en lecture seule
+    """
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def _init_worker(db_path: str) -> None:
+    """Initialise la connexion en lecture seule d'un processus worker."""
+    global _worker_conn
+    _worker_conn = open_readonly_connection(db_path)
+
+
+def _fetch_team_games(conn: sqlite3.Connection, season: str, team_id: int) -> List[Dict[str, Any]]:
+    """Récupère les matchs terminés d'une équipe avec leurs quart-temps.
+
+    Args:
+        conn: Connexion SQLite
+        season: Saison concernée
+        team_id: Identifiant de l'équipe
+
+    Returns:
+        Liste des matchs, chacun avec ses scores par quart-temps du point de vue de l'équipe
+    """
+    query = """
+        SELECT g.id, g.home_team_id, g.home_score, g.away_score,
+               q.quarter, q.home_score AS q_home, q.away_score AS q_away
+        FROM games g
+        JOIN game_quarters q ON q.game_id = g.id
+        WHERE g.season = ? AND g.status = 'finished'
+          AND (g.home_team_id = ? OR g.away_team_id = ?)
+        ORDER BY g.id, q.quarter
+    """
+    games: Dict[int, Dict[str, Any]] = {}
+    for row in conn.execute(query, (season, team_id, team_id)):
+        game = games.get(row['id'])
+        if game is None:
+            is_home = row['home_team_id'] == team_id
+            game = games[row['id']] = {
+                'is_home': is_home,
+                'points_for': row['home_score'] if is_home else row['away_score'],
+                'points_against': row['away_score'] if is_home else row['home_score'],
+                'quarters': []
+            }
+        if game['is_home']:
+            game['quarters'].append((row['quarter'], row['q_home'], row['q_away']))
+        else:
+            game['quarters'].append((row['quarter'], row['q_away'], row['q_home']))
+    return list(games.values())
+
+
+def _compute_quarter_profiles(games: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Calcule les profils de performance des quatre quart-temps réguliers."""
+    profiles = []
+    for quarter in range(1, 5):
+        points_for = []
+        points_against = []
+        for game in games:
+            for q, pf, pa in game['quarters']:
+                if q == quarter:
+                    points_for.append(pf)
+                    points_against.append(pa)
+        if not points_for:
+            continue
+        won = sum(1 for pf, pa in zip(points_for, points_against) if pf > pa)
+        profiles.append({
+            'quarter': quarter,
+            'avg_points_for': statistics.fmean(points_for),
+            'avg_points_against': statistics.fmean(points_against),
+            'std_points_for': statistics.pstdev(points_for),
+            'std_points_against': statistics.pstdev(points_against),
+            'win_percentage': won / len(points_for) * 100
+        })
+    return profiles
+
+
+def _compute_badges(games: List[Dict[str, Any]], profiles: List[Dict[str, Any]],
+                    margins: Dict[str, Any], close_games: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """Évalue les badges calculables à partir des scores par quart-temps.
+
+    Args:
+        games: Matchs de l'équipe pour la saison
+        profiles: Profils par quart-temps de l'équipe
+        margins: Synthèse issue de l'index des marges (`get_margin_summary`)
+        close_games: Matchs serrés de l'équipe (`get_close_games`)
+
+    Returns:
+        Liste de couples (code du badge, justification)
+    """
+    badges = []
+    quarters = [(pf, pa) for game in games for q, pf, pa in game['quarters'] if q <= 4]
+    if quarters:
+        total = len(quarters)
+        scorer = sum(1 for pf, _ in quarters if pf > 25) / total
+        if scorer > 0.6:
+            badges.append(('SCORER', f"Plus de 25 points dans {scorer:.0%} des quart-temps"))
+        defensive = sum(1 for _, pa in quarters if pa < 20) / total
+        if defensive > 0.5:
+            badges.append(('DEFENSIVE', f"Moins de 20 points encaissés dans {defensive:.0%} des quart-temps"))
+        solid = sum(1 for pf, pa in quarters if pf > pa) / total
+        if solid > 0.7:
+            badges.append(('SOLID', f"Différentiel positif dans {solid:.0%} des quart-temps"))
+    if len(profiles) == 4:
+        spread = statistics.pstdev(p['avg_points_for'] for p in profiles)
+        if spread < 5:
+            badges.append(('CONSISTENT', f"Écart-type de {spread:.1f} points entre quart-temps"))
+
+    home_games = [g for g in games if g['is_home']]
+    if home_games:
+        home_rate = sum(1 for g in home_games if g['points_for'] > g['points_against']) / len(home_games)
+        if home_rate > 0.7:
+            badges.append(('HOME_FORCE', f"{home_rate:.0%} de victoires à domicile"))
+
+    if margins['games'] and margins['worst_loss'] <= 15:
+        badges.append(('RESISTANT', f"Aucune défaite de plus de 15 points sur {margins['games']} matchs"))
+
+    if margins['trailed_games']:
+        comeback_rate = margins['comeback_wins'] / margins['trailed_games']
+        if comeback_rate >= 0.3:
+            badges.append(('OVERTURNER', f"{comeback_rate:.0%} de victoires après un retard de 10 points ou plus"))
+
+    # Seuls les scores par période sont disponibles : la dernière période
+    # (quatrième quart-temps ou prolongation) tient lieu de fin de match.
+    finishes = [g['period_margins'][-1] - g['period_margins'][-2]
+                for g in close_games if len(g['period_margins']) >= 2]
+    if len(finishes) >= CLUTCH_MIN_GAMES:
+        differential = sum(finishes)
+        if differential > 0:
+            badges.append(('CLUTCH', f"Différentiel de {differential:+d} points en dernière période "
+                                     f"sur {len(finishes)} matchs serrés"))
+    return badges
+
+
+def _recompute_team_season(season: str, team_id: int) -> Dict[str, Any]:
+    """Tâche worker : profils et badges d'une équipe pour une saison."""
+    games = _fetch_team_games(_worker_conn, season, team_id)
+    profiles = _compute_quarter_profiles(games)
+    return {
+        'kind': 'team',
+        'season': season,
+        'team_id': team_id,
+        'games': len(games),
+        'profiles': profiles,
+        'badges': _compute_badges(games, profiles, get_margin_summary(_worker_conn, team_id, season),
+                                  get_close_games(_worker_conn, team_id, CLOSE_GAME_MARGIN, season=season))
+    }
+
+
+def _backtest_season(season: str) -> Dict[str, Any]:
+    """Tâche worker : backtest des prédictions d'une saison."""
+    query = """
+        SELECT p.home_win_probability, g.home_score, g.away_score
+        FROM predictions p
+        JOIN games g ON g.id = p.game_id
+        WHERE g.season = ? AND g.status = 'finished'
+          AND g.home_score IS NOT NULL AND g.away_score IS NOT NULL
+    """
+    total = 0
+    correct = 0
+    brier = 0.0
+    for row in _worker_conn.execute(query, (season,)):
+        home_win = row['home_score'] > row['away_score']
+        probability = row['home_win_probability']
+        total += 1
+        correct += (probability > 0.5) == home_win
+        brier += (probability - (1.0 if home_win else 0.0)) ** 2
+    return {
+        'kind': 'backtest',
+        'season': season,
+        'predictions': total,
+        'correct': correct,
+        'accuracy': correct / total if total else None,
+        'brier_score': brier / total if total else None
+    }
+
+
+def _run_task(task: Tuple) -> Dict[str, Any]:
+    """Point d'entrée des workers : distribue la tâche selon son type."""
+    if task[0] == 'team':
+        return _recompute_team_season(task[1], task[2])
+    return _backtest_season(task[1])
+
+
+def _plan_tasks(conn: sqlite3.Connection, seasons: Optional[List[str]]) -> Tuple[List[str], List[Tuple]]:
+    """Construit la liste des tâches (saison, équipe) et de backtest.
+
+    Args:
+        conn: Connexion SQLite en lecture seule
+        seasons: Saisons à recalculer (toutes si None)
+
+    Returns:
+        Saisons retenues et liste des tâches
+    """
+    if not seasons:
+        rows = conn.execute("SELECT DISTINCT season FROM games WHERE season IS NOT NULL ORDER BY season")
+        seasons = [row['season'] for row in rows]
+    tasks: List[Tuple] = []
+    for season in seasons:
+        rows = conn.execute("""
+            SELECT home_team_id AS team_id FROM games WHERE season = ?
+            UNION
+            SELECT away_team_id FROM games WHERE season = ?
+        """, (season, season))
+        tasks.extend(('team', season, row['team_id']) for row in rows)
+        tasks.append(('backtest', season))
+    return seasons, tasks
+
+
+class ResultWriter:
+    """Écrivain unique fusionnant et persistant les résultats des workers."""
+
+    def __init__(self, db_path: str):
+        """Initialise l'écrivain.
+
+        Args:
+            db_path: Chemin du fichier de base de données
+        """
+        self.db_path = db_path
+        self.team_results: List[Dict[str, Any]] = []
+        self.backtests: List[Dict[str, Any]] = []
+
+    def add(self, result: Dict[str, Any]) -> None:
+        """Ajoute le résultat d'une tâche à la fusion."""
+        if result['kind'] == 'team':
+            self.team_results.append(result)
+        else:
+            self.backtests.append(result)
+
+    def write(self, current_season: Optional[str] = None) -> None:
+        """Écrit l'ensemble des résultats dans une seule transaction.
+
+        Args:
+            current_season: Saison en cours ; si elle fait partie des résultats,
+                `quarter_profiles` est mis à jour à partir de celle-ci
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                profile_rows = []
+                badge_rows = []
+                for result in self.team_results:
+                    for p in result['profiles']:
+                        profile_rows.append((
+                            result['team_id'], result['season'], p['quarter'], result['games'],
+                            p['avg_points_for'], p['avg_points_against'],
+                            p['std_points_for'], p['std_points_against'], p['win_percentage']
+                        ))
+                    conn.execute(
+                        "DELETE FROM season_quarter_profiles WHERE team_id = ? AND season = ?",
+                        (result['team_id'], result['season'])
+                    )
+                    conn.execute(
+                        "DELETE FROM season_team_badges WHERE team_id = ? AND season = ?",
+                        (result['team_id'], result['season'])
+                    )
+                    badge_rows.extend(
+                        (result['team_id'], result['season'], code, justification)
+                        for code, justification in result['badges']
+                    )
+                conn.executemany("""
+                    INSERT INTO season_quarter_profiles
+                        (team_id, season, quarter, games_played, avg_points_for, avg_points_against,
+                         std_points_for, std_points_against, win_percentage, last_update)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+                """, profile_rows)
+                conn.executemany("""
+                    INSERT INTO season_team_badges (team_id, season, badge_code, justification)
+                    VALUES (?, ?, ?, ?)
+                """, badge_rows)
+                conn.executemany("""
+                    INSERT OR REPLACE INTO season_prediction_backtests
+                        (season, predictions, correct, accuracy, brier_score, last_update)
+                    VALUES (?, ?, ?, ?, ?, datetime('now'))
+                """, [(b['season'], b['predictions'], b['correct'], b['accuracy'], b['brier_score'])
+                      for b in self.backtests])
+
+                if current_season is not None:
+                    conn.executemany("""
+                        INSERT OR REPLACE INTO quarter_profiles
+                            (team_id, quarter, avg_points_for, avg_points_against,
+                             std_points_for, std_points_against, win_percentage, last_update)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))
+                    """, [row[:1] + row[2:3] + row[4:] for row in profile_rows if row[1] == current_season])
+        finally:
+            conn.close()
+
+
+def recompute(db_path: str, seasons: Optional[List[str]] = None, workers: Optional[int] = None,
+              update_current: bool = True) -> Dict[str, Any]:
+    """Recalcule les données dérivées des saisons demandées sur un pool de processus.
+
+    Args:
+        db_path: Chemin du fichier de base de données
+        seasons: Saisons à recalculer (toutes si None)
+        workers: Nombre de processus (défaut: nombre de cœurs)
+        update_current: Met à jour `quarter_profiles` si la saison en cours
+            (la plus récente de `games`) fait partie des saisons recalculées
+
+    Returns:
+        Statistiques d'exécution (tâches, matchs traités, durée, débit)
+    """
+    workers = workers or os.cpu_count() or 1
+    # Une liste vide (`--seasons` sans valeur) signifie toutes les saisons
+    seasons = seasons or None
+
+    apply_schema(db_path)
+    planning_conn = open_readonly_connection(db_path)
+    try:
+        seasons, tasks = _plan_tasks(planning_conn, seasons)
+        current_season = planning_conn.execute("SELECT MAX(season) FROM games").fetchone()[0]
+    finally:
+        planning_conn.close()
+
+    # Compléter l'index des marges des saisons retenues avant de lancer les workers
+    margins_conn = sqlite3.connect(db_path)
+    try:
+        indexed = build_game_margins(margins_conn, seasons=seasons)
+    finally:
+        margins_conn.close()
+    logger.info(f"Index des marges mis à jour pour {indexed} matchs")
+
+    logger.info(f"Recalcul de {len(seasons)} saison(s), {len(tasks)} tâches sur {workers} processus")
+    writer = ResultWriter(db_path)
+    games_processed = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(db_path,)) as executor:
+        futures = [executor.submit(_run_task, task) for task in tasks]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            writer.add(result)
+            if result['kind'] == 'team':
+                games_processed += result['games']
+            elapsed = time.perf_counter() - start
+            logger.info(f"[{done}/{len(tasks)}] saison {result['season']} - "
+                        f"{done / elapsed:.1f} tâches/s, {games_processed / elapsed:.0f} matchs/s")
+    compute_time = time.perf_counter() - start
+
+    # Un recalcul d'anciennes saisons ne doit jamais écraser les profils courants
+    if not update_current or current_season not in seasons:
+        current_season = None
+    writer.write(current_season=current_season)
+    elapsed = time.perf_counter() - start
+    stats = {
+        'seasons': seasons,
+        'tasks': len(tasks),
+        'games_processed': games_processed,
+        'workers': workers,
+        'compute_seconds': compute_time,
+        'total_seconds': elapsed,
+        'tasks_per_second': len(tasks) / compute_time if compute_time else 0.0
+    }
+    logger.info(f"Recalcul terminé : {len(tasks)} tâches en {elapsed:.2f}s "
+                f"(calcul {compute_time:.2f}s, {stats['tasks_per_second']:.1f} tâches/s)")
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Point d'entrée en ligne de commande."""
+    parser = argparse.ArgumentParser(description="Recalcul historique des données dérivées Momentrix")
+    parser.add_argument('--database', required=True, help="Chemin du fichier SQLite")
+    parser.add_argument('--seasons', nargs='*', help="Saisons à recalculer (défaut: toutes)")
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de processus (défaut: nombre de cœurs)")
+    parser.add_argument('--no-update-current', action='store_true',
+                        help="Ne pas mettre à jour quarter_profiles même si la saison en cours est recalculée")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    recompute(args.database, seasons=args.seasons, workers=args.workers,
+              update_current=not args.no_update_current)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
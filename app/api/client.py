@@ -8,14 +8,34 @@ import requests
 import json
 import time
 import hashlib
-from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Set, Tuple
 from flask import current_app, g
 from app.data.database import get_db_connection
 
+# Colonnes ajoutées à api_cache pour les requêtes conditionnelles
+CACHE_VALIDATOR_COLUMNS = {
+    'etag': 'TEXT',
+    'last_modified': 'TEXT',
+    'content_hash': 'TEXT'
+}
+
+# Table des empreintes des données effectivement ingérées
+INGESTION_HASHES_TABLE = """
+    CREATE TABLE IF NOT EXISTS ingestion_hashes (
+        resource TEXT NOT NULL,
+        resource_id INTEGER NOT NULL,
+        content_hash TEXT NOT NULL,
+        ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (resource, resource_id)
+    )
+"""
+
 class NBAApiClient:
     """Client pour l'API NBA avec gestion du cache."""
     
+    # Fichiers de base dont la migration des colonnes de validation a été vérifiée
+    _cache_schema_checked = set()
+    
     def __init__(self, api_key: str, api_host: str, cache_timeout: int = 86400):
         """Initialise le client API.
         
@@ -83,13 +103,95 @@ class NBAApiClient:
         finally:
             conn.close()
     
-    def _save_to_cache(self, endpoint: str, params: Dict[str, Any], response: Dict[str, Any]) -> bool:
+    @classmethod
+    def _ensure_cache_schema(cls, conn) -> None:
+        """Migre une base existante pour les requêtes conditionnelles.
+        
+        `CREATE TABLE IF NOT EXISTS` ne modifie pas une table déjà créée : les
+        colonnes de validation sont ajoutées à api_cache et la table
+        ingestion_hashes est créée si nécessaire.
+        
+        Args:
+            conn: Connexion SQLite
+        """
+        # Une base en mémoire n'a pas de chemin : elle est vérifiée à chaque fois
+        db_file = next((row[2] for row in conn.execute("PRAGMA database_list") if row[1] == 'main'), '')
+        if db_file and db_file in cls._cache_schema_checked:
+            return
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(api_cache)")}
+        for column, column_type in CACHE_VALIDATOR_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE api_cache ADD COLUMN {column} {column_type}")
+        conn.execute(INGESTION_HASHES_TABLE)
+        conn.commit()
+        if db_file:
+            cls._cache_schema_checked.add(db_file)
+    
+    def _get_cache_entry(self, endpoint: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Récupère la dernière entrée de cache, même expirée, avec ses validateurs.
+        
+        Args:
+            endpoint: Point d'entrée de l'API
+            params: Paramètres de la requête
+            
+        Returns:
+            Entrée de cache (id, response, etag, last_modified, content_hash) ou None
+        """
+        db = get_db_connection()
+        conn = db._get_connection()
+        try:
+            self._ensure_cache_schema(conn)
+            cursor = conn.cursor()
+            params_str = json.dumps(params, sort_keys=True)
+            query = """
+                SELECT id, response, etag, last_modified, content_hash
+                FROM api_cache
+                WHERE endpoint = ? AND parameters = ?
+                ORDER BY timestamp DESC, id DESC
+                LIMIT 1
+            """
+            cursor.execute(query, (endpoint, params_str))
+            result = cursor.fetchone()
+            
+            if result:
+                return {
+                    'id': result['id'],
+                    'response': json.loads(result['response']),
+                    'etag': result['etag'],
+                    'last_modified': result['last_modified'],
+                    'content_hash': result['content_hash']
+                }
+            return None
+        except Exception as e:
+            current_app.logger.error(f"Erreur lors de la récupération du cache: {e}")
+            return None
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def _hash_payload(data: Dict[str, Any]) -> str:
+        """Calcule l'empreinte du contenu d'une réponse.
+        
+        Args:
+            data: Réponse de l'API
+            
+        Returns:
+            Empreinte SHA-256 de la représentation JSON canonique
+        """
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+    
+    def _save_to_cache(self, endpoint: str, params: Dict[str, Any], response: Dict[str, Any],
+                       etag: Optional[str] = None, last_modified: Optional[str] = None,
+                       content_hash: Optional[str] = None) -> bool:
         """Sauvegarde une réponse API dans le cache.
         
         Args:
             endpoint: Point d'entrée de l'API
             params: Paramètres de la requête
             response: Réponse de l'API à mettre en cache
+            etag: En-tête ETag renvoyé par l'API (optionnel)
+            last_modified: En-tête Last-Modified renvoyé par l'API (optionnel)
+            content_hash: Empreinte du contenu (calculée si absente)
             
         Returns:
             True si sauvegarde réussie, False sinon
@@ -97,16 +199,20 @@ class NBAApiClient:
         db = get_db_connection()
         conn = db._get_connection()
         try:
+            self._ensure_cache_schema(conn)
             cursor = conn.cursor()
             params_str = json.dumps(params, sort_keys=True)
             response_str = json.dumps(response)
-            expiry = datetime.now() + timedelta(seconds=self.cache_timeout)
+            expiry = f"{self.cache_timeout:+d} seconds"
             
+            # L'expiration est calculée par SQLite pour rester comparable à datetime('now')
             query = """
-                INSERT INTO api_cache (endpoint, parameters, response, timestamp, expiry)
-                VALUES (?, ?, ?, datetime('now'), ?)
+                INSERT INTO api_cache (endpoint, parameters, response, timestamp, expiry,
+                                       etag, last_modified, content_hash)
+                VALUES (?, ?, ?, datetime('now'), datetime('now', ?), ?, ?, ?)
             """
-            cursor.execute(query, (endpoint, params_str, response_str, expiry.isoformat()))
+            cursor.execute(query, (endpoint, params_str, response_str, expiry,
+                                   etag, last_modified, content_hash or self._hash_payload(response)))
             conn.commit()
             return True
         except Exception as e:
@@ -115,6 +221,104 @@ class NBAApiClient:
         finally:
             conn.close()
     
+    def _extend_cache_expiry(self, entry_id: int, etag: Optional[str] = None,
+                             last_modified: Optional[str] = None) -> bool:
+        """Prolonge la validité d'une entrée de cache dont le contenu n'a pas changé.
+        
+        Args:
+            entry_id: Identifiant de l'entrée de cache
+            etag: Nouvel ETag renvoyé par l'API (conserve l'ancien si absent)
+            last_modified: Nouveau Last-Modified renvoyé par l'API (conserve l'ancien si absent)
+            
+        Returns:
+            True si mise à jour réussie, False sinon
+        """
+        db = get_db_connection()
+        conn = db._get_connection()
+        try:
+            self._ensure_cache_schema(conn)
+            cursor = conn.cursor()
+            expiry = f"{self.cache_timeout:+d} seconds"
+            
+            query = """
+                UPDATE api_cache
+                SET expiry = datetime('now', ?), timestamp = datetime('now'),
+                    etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)
+                WHERE id = ?
+            """
+            cursor.execute(query, (expiry, etag, last_modified, entry_id))
+            conn.commit()
+            return True
+        except Exception as e:
+            current_app.logger.error(f"Erreur lors de la prolongation du cache: {e}")
+            return False
+        finally:
+            conn.close()
+    
+    def _changed_since_ingestion(self, resource: str, items: Dict[int, Any]) -> Set[int]:
+        """Identifie les éléments dont le contenu diffère de la dernière ingestion.
+        
+        Args:
+            resource: Type de ressource ("game", "game_details", "game_statistics")
+            items: Contenu de chaque élément, indexé par identifiant
+            
+        Returns:
+            Identifiants des éléments jamais ingérés ou modifiés
+        """
+        if not items:
+            return set()
+        db = get_db_connection()
+        conn = db._get_connection()
+        try:
+            self._ensure_cache_schema(conn)
+            query = """
+                SELECT resource_id, content_hash
+                FROM ingestion_hashes
+                WHERE resource = ? AND resource_id IN (SELECT value FROM json_each(?))
+            """
+            ingested = dict(conn.execute(query, (resource, json.dumps(list(items)))).fetchall())
+        except Exception as e:
+            # Sans référence fiable, tout est considéré comme modifié
+            current_app.logger.error(f"Erreur lors de la lecture des empreintes d'ingestion: {e}")
+            return set(items)
+        finally:
+            conn.close()
+        return {
+            item_id for item_id, payload in items.items()
+            if ingested.get(item_id) != self._hash_payload(payload)
+        }
+    
+    def mark_ingested(self, resource: str, resource_id: int, payload: Any) -> bool:
+        """Enregistre l'empreinte d'un élément après son ingestion.
+        
+        À appeler par l'ingestion une fois les données stockées, afin que les
+        méthodes `*_with_status` ne signalent plus cet élément comme modifié.
+        
+        Args:
+            resource: Type de ressource ("game", "game_details", "game_statistics")
+            resource_id: Identifiant de l'élément
+            payload: Contenu ingéré
+            
+        Returns:
+            True si enregistrement réussi, False sinon
+        """
+        db = get_db_connection()
+        conn = db._get_connection()
+        try:
+            self._ensure_cache_schema(conn)
+            query = """
+                INSERT OR REPLACE INTO ingestion_hashes (resource, resource_id, content_hash, ingested_at)
+                VALUES (?, ?, ?, datetime('now'))
+            """
+            conn.execute(query, (resource, resource_id, self._hash_payload(payload)))
+            conn.commit()
+            return True
+        except Exception as e:
+            current_app.logger.error(f"Erreur lors de l'enregistrement de l'empreinte d'ingestion: {e}")
+            return False
+        finally:
+            conn.close()
+    
     def request(self, endpoint: str, params: Dict[str, Any] = None, force_refresh: bool = False) -> Dict[str, Any]:
         """Effectue une requête vers l'API NBA avec gestion du cache.
         
@@ -126,6 +330,33 @@ class NBAApiClient:
         Returns:
             Données de réponse de l'API
             
+        Raises:
+            Exception: En cas d'erreur dans la requête API
+        """
+        data, _ = self.request_with_status(endpoint, params, force_refresh)
+        return data
+    
+    def request_with_status(self, endpoint: str, params: Dict[str, Any] = None,
+                            force_refresh: bool = False) -> Tuple[Dict[str, Any], bool]:
+        """Effectue une requête conditionnelle et indique si les données ont changé.
+        
+        Lorsque le cache est expiré, la requête est envoyée avec les validateurs
+        stockés (If-None-Match / If-Modified-Since). Sur un 304 ou un contenu
+        d'empreinte identique, seule l'expiration de l'entrée est prolongée.
+        
+        Le signal porte sur le cache partagé par tous les appelants : l'ingestion
+        doit utiliser les méthodes `*_with_status` par match, qui comparent aux
+        données effectivement ingérées (voir `mark_ingested`).
+        
+        Args:
+            endpoint: Point d'entrée de l'API (e.g., "teams", "games", "statistics")
+            params: Paramètres de la requête
+            force_refresh: Force le téléchargement complet depuis l'API, sans
+                cache ni en-têtes conditionnels
+            
+        Returns:
+            Tuple (données de réponse, True si le contenu diffère de celui en cache)
+            
         Raises:
             Exception: En cas d'erreur dans la requête API
         """
@@ -137,7 +368,16 @@ class NBAApiClient:
             cached_response = self._get_from_cache(endpoint, params)
             if cached_response:
                 current_app.logger.debug(f"Utilisation des données en cache pour {endpoint}")
-                return cached_response
+                return cached_response, False
+        
+        # Récupérer la dernière entrée, même expirée, pour ses validateurs
+        cache_entry = self._get_cache_entry(endpoint, params)
+        headers = dict(self.headers)
+        if cache_entry and not force_refresh:
+            if cache_entry['etag']:
+                headers["If-None-Match"] = cache_entry['etag']
+            if cache_entry['last_modified']:
+                headers["If-Modified-Since"] = cache_entry['last_modified']
         
         # Construire l'URL complète
         url = f"{self.base_url}/{endpoint}"
@@ -145,23 +385,39 @@ class NBAApiClient:
         try:
             # Effectuer la requête API
             current_app.logger.info(f"Requête API vers {endpoint} avec paramètres {params}")
-            response = requests.get(url, headers=self.headers, params=params)
+            response = requests.get(url, headers=headers, params=params)
+            
+            if response.status_code == 304 and cache_entry:
+                current_app.logger.debug(f"Données inchangées (304) pour {endpoint}")
+                # Le serveur peut renouveler ses validateurs sur un 304
+                self._extend_cache_expiry(cache_entry['id'],
+                                          response.headers.get("ETag"),
+                                          response.headers.get("Last-Modified"))
+                return cache_entry['response'], False
+            
             response.raise_for_status()  # Lever une exception en cas d'erreur HTTP
             
             # Analyser la réponse JSON
             data = response.json()
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            content_hash = self._hash_payload(data)
+            
+            if cache_entry and cache_entry['content_hash'] == content_hash:
+                current_app.logger.debug(f"Contenu identique pour {endpoint}, prolongation du cache")
+                self._extend_cache_expiry(cache_entry['id'], etag, last_modified)
+                return cache_entry['response'], False
             
             # Mettre en cache la réponse
-            self._save_to_cache(endpoint, params, data)
+            self._save_to_cache(endpoint, params, data, etag, last_modified, content_hash)
             
-            return data
+            return data, True
         except requests.exceptions.RequestException as e:
             current_app.logger.error(f"Erreur lors de la requête API vers {endpoint}: {e}")
-            # En cas d'erreur, tenter de récupérer du cache même si expiré comme solution de secours
-            cached_response = self._get_from_cache(endpoint, params)
-            if cached_response:
+            # En cas d'erreur, utiliser le cache même si expiré comme solution de secours
+            if cache_entry:
                 current_app.logger.warning(f"Utilisation des données en cache expirées pour {endpoint} suite à une erreur")
-                return cached_response
+                return cache_entry['response'], False
             raise Exception(f"Erreur lors de la requête API et aucune donnée en cache: {e}")
     
     def get_teams(self) -> Dict[str, Any]:
@@ -201,6 +457,31 @@ class NBAApiClient:
             
         return self.request("games", params)
     
+    def get_games_with_status(self, date: Optional[str] = None,
+                              team_id: Optional[int] = None) -> Tuple[Dict[str, Any], Set[int]]:
+        """Récupère les matchs et identifie ceux dont les données ont changé.
+        
+        Chaque match est comparé par empreinte à la version enregistrée par
+        l'ingestion (`mark_ingested("game", ...)`), indépendamment du cache
+        partagé : un match jamais ingéré est toujours signalé.
+        
+        Args:
+            date: Date des matchs au format "YYYY-MM-DD" (optionnel)
+            team_id: Identifiant de l'équipe (optionnel)
+            
+        Returns:
+            Tuple (données des matchs, identifiants des matchs nouveaux ou modifiés)
+        """
+        params = {}
+        if date:
+            params["date"] = date
+        if team_id:
+            params["team"] = team_id
+        
+        data = self.request("games", params)
+        games = {game['id']: game for game in data.get('response', []) if 'id' in game}
+        return data, self._changed_since_ingestion("game", games)
+    
     def get_game_details(self, game_id: int) -> Dict[str, Any]:
         """Récupère les détails d'un match spécifique.
         
@@ -212,6 +493,18 @@ class NBAApiClient:
         """
         return self.request(f"games/{game_id}")
     
+    def get_game_details_with_status(self, game_id: int) -> Tuple[Dict[str, Any], bool]:
+        """Récupère les détails d'un match et indique s'ils ont changé.
+        
+        Args:
+            game_id: Identifiant du match
+            
+        Returns:
+            Tuple (détails du match, True si différents de la dernière ingestion)
+        """
+        data = self.request(f"games/{game_id}")
+        return data, bool(self._changed_since_ingestion("game_details", {game_id: data}))
+    
     def get_game_statistics(self, game_id: int) -> Dict[str, Any]:
         """Récupère les statistiques d'un match spécifique.
         
@@ -223,6 +516,18 @@ class NBAApiClient:
         """
         return self.request(f"statistics/games/{game_id}")
     
+    def get_game_statistics_with_status(self, game_id: int) -> Tuple[Dict[str, Any], bool]:
+        """Récupère les statistiques d'un match et indique si elles ont changé.
+        
+        Args:
+            game_id: Identifiant du match
+            
+        Returns:
+            Tuple (statistiques du match, True si différentes de la dernière ingestion)
+        """
+        data = self.request(f"statistics/games/{game_id}")
+        return data, bool(self._changed_since_ingestion("game_statistics", {game_id: data}))
+    
     def get_players(self, team_id: Optional[int] = None) -> Dict[str, Any]:
         """Récupère la liste des joueurs.
         
@@ -0,0 +1,267 @@
+"""Résolution groupée des ressources pour l'API JSON.
+
+Ce module regroupe les demandes de ressources (équipes, matchs, profils,
+badges, prédictions) d'un même appel et les résout avec une requête SQL
+ensembliste par type de ressource, puis sérialise les modèles de données
+avec sélection de champs.
+
+Format d'une demande :
+    {"resource": "teams", "ids": [1, 2], "fields": ["id", "name", "record"]}
+
+Les identifiants `ids` désignent la clé de recherche de la ressource :
+    - teams, games : identifiants des équipes / matchs
+    - profiles, badges, recent_games : identifiants d'équipes
+    - predictions : identifiants de matchs
+"""
+
+import json
+import sqlite3
+from dataclasses import fields as dataclass_fields
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple, Type
+
+from app.data.models import Team, Game, Badge, Prediction, QuarterProfile
+
+# Nombre maximal de demandes par appel groupé
+MAX_BATCH_SIZE = 50
+
+# Nombre maximal de matchs récents par équipe
+MAX_RECENT_GAMES = 82
+
+# Propriétés calculées exposables en plus des champs des modèles
+_COMPUTED_FIELDS = {
+    Team: ('record',),
+    Game: ('is_finished', 'winner_id'),
+    QuarterProfile: ('avg_differential',),
+}
+
+# Colonnes horodatées à convertir en datetime
+_DATETIME_FIELDS = {'date', 'birth_date', 'attribution_date', 'creation_date', 'last_update'}
+
+_TEAM_COLUMNS = "id, name, code, conference, division, logo_url, wins, losses"
+_GAME_COLUMNS = "id, date, home_team_id, away_team_id, home_score, away_score, status, arena"
+_TEAM_GAME_COLUMNS = ", ".join(f"g.{column}" for column in _GAME_COLUMNS.split(", "))
+
+# Ressource -> (modèle, requête, colonne de regroupement, résultat unique par clé)
+_RESOURCES: Dict[str, Tuple[Type, str, str, bool]] = {
+    'teams': (Team, f"""
+        SELECT {_TEAM_COLUMNS} FROM teams
+        WHERE id IN (SELECT value FROM json_each(?))
+    """, 'id', True),
+    'games': (Game, f"""
+        SELECT {_GAME_COLUMNS} FROM games
+        WHERE id IN (SELECT value FROM json_each(?))
+    """, 'id', True),
+    'profiles': (QuarterProfile, """
+        SELECT team_id, quarter, avg_points_for, avg_points_against,
+               std_points_for, std_points_against, win_percentage, last_update
+        FROM quarter_profiles
+        WHERE team_id IN (SELECT value FROM json_each(?))
+        ORDER BY team_id, quarter
+    """, 'team_id', False),
+    'badges': (Badge, """
+        SELECT id, team_id, badge_code, attribution_date, justification, is_active
+        FROM team_badges
+        WHERE is_active = 1 AND team_id IN (SELECT value FROM json_each(?))
+        ORDER BY team_id, attribution_date DESC
+    """, 'team_id', False),
+    'predictions': (Prediction, """
+        SELECT id, game_id, home_win_probability, predicted_home_score, predicted_away_score,
+               creation_date, confidence_level, key_factors
+        FROM predictions
+        WHERE game_id IN (SELECT value FROM json_each(?))
+        ORDER BY game_id, creation_date DESC
+    """, 'game_id', True),
+    'recent_games': (Game, f"""
+        WITH team_games AS (
+            SELECT k.value AS team_key, {_TEAM_GAME_COLUMNS}
+            FROM json_each(?) k JOIN games g ON g.home_team_id = k.value
+            WHERE g.status = 'finished'
+            UNION ALL
+            SELECT k.value AS team_key, {_TEAM_GAME_COLUMNS}
+            FROM json_each(?) k JOIN games g ON g.away_team_id = k.value
+            WHERE g.status = 'finished'
+        )
+        SELECT * FROM (
+            SELECT team_games.*,
+                   ROW_NUMBER() OVER (PARTITION BY team_key ORDER BY date DESC, id DESC) AS game_rank
+            FROM team_games
+        )
+        WHERE game_rank <= ?
+        ORDER BY team_key, game_rank
+    """, 'team_key', False),
+}
+
+# Noms des champs de chaque modèle, calculés une seule fois
+_MODEL_FIELDS: Dict[Type, Tuple[str, ...]] = {
+    model: tuple(f.name for f in dataclass_fields(model))
+    for model in {spec[0] for spec in _RESOURCES.values()}
+}
+
+
+def _parse_datetime(value: Any) -> Any:
+    """Convertit une valeur horodatée SQLite en datetime si possible."""
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _json_value(value: Any) -> Any:
+    """Convertit une valeur de modèle en valeur sérialisable en JSON."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def serialize(obj: Any, selected: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+    """Sérialise un modèle de données en dictionnaire.
+
+    Args:
+        obj: Instance d'un modèle de `app.data.models`
+        selected: Champs à inclure (tous les champs du modèle si None)
+
+    Returns:
+        Dictionnaire sérialisable en JSON
+    """
+    names = selected or _MODEL_FIELDS[type(obj)]
+    return {name: _json_value(getattr(obj, name)) for name in names}
+
+
+class BatchResolver:
+    """Résout un lot de demandes de ressources avec une requête par type."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        """Initialise le résolveur.
+
+        Args:
+            conn: Connexion SQLite
+        """
+        self.conn = conn
+        self.conn.row_factory = sqlite3.Row
+
+    def _validate(self, item: Any) -> Dict[str, Any]:
+        """Valide et normalise une demande.
+
+        Raises:
+            ValueError: Si la demande est invalide
+        """
+        if not isinstance(item, dict):
+            raise ValueError(f"Demande invalide: {item}")
+        if not isinstance(item.get('resource'), str) or item['resource'] not in _RESOURCES:
+            raise ValueError(f"Ressource inconnue: {item.get('resource')}")
+        resource = item['resource']
+        model = _RESOURCES[resource][0]
+
+        ids = item.get('ids')
+        if ids is None and resource != 'teams':
+            raise ValueError(f"Identifiants manquants pour la ressource {resource}")
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+                raise ValueError(f"Identifiants invalides pour la ressource {resource}")
+
+        selected = item.get('fields')
+        if selected is not None:
+            allowed = _MODEL_FIELDS[model] + _COMPUTED_FIELDS.get(model, ())
+            if not isinstance(selected, list) or not selected:
+                raise ValueError(f"Sélection de champs invalide pour la ressource {resource}")
+            unknown = [name for name in selected if not isinstance(name, str) or name not in allowed]
+            if unknown:
+                raise ValueError(f"Champs inconnus pour la ressource {resource}: {', '.join(map(str, unknown))}")
+            selected = tuple(selected)
+
+        limit = 0
+        if resource == 'recent_games':
+            limit = item.get('limit', 5)
+            if not isinstance(limit, int) or isinstance(limit, bool) or not 0 < limit <= MAX_RECENT_GAMES:
+                raise ValueError(f"Limite invalide (1-{MAX_RECENT_GAMES})")
+
+        return {'resource': resource, 'ids': ids, 'fields': selected, 'limit': limit}
+
+    def _load(self, resource: str, keys: Optional[List[int]], limit: int) -> Dict[int, List[Any]]:
+        """Charge toutes les instances d'une ressource pour un ensemble de clés.
+
+        Args:
+            resource: Nom de la ressource
+            keys: Clés de recherche (toutes les lignes si None, pour les équipes)
+            limit: Nombre maximal de lignes par clé (matchs récents)
+
+        Returns:
+            Instances du modèle regroupées par clé
+        """
+        model, query, key_column, _ = _RESOURCES[resource]
+        names = _MODEL_FIELDS[model]
+        if keys is None:
+            query = f"SELECT {_TEAM_COLUMNS} FROM teams ORDER BY name"
+            params: Tuple = ()
+        elif resource == 'recent_games':
+            keys_json = json.dumps(keys)
+            params = (keys_json, keys_json, limit)
+        else:
+            params = (json.dumps(keys),)
+
+        grouped: Dict[int, List[Any]] = {}
+        for row in self.conn.execute(query, params):
+            values = {name: row[name] for name in names}
+            for name in _DATETIME_FIELDS.intersection(values):
+                values[name] = _parse_datetime(values[name])
+            if 'is_active' in values:
+                values['is_active'] = bool(values['is_active'])
+            grouped.setdefault(row[key_column], []).append(model(**values))
+        return grouped
+
+    def resolve(self, items: List[Any]) -> List[Dict[str, Any]]:
+        """Résout un lot de demandes de ressources.
+
+        Les clés de toutes les demandes portant sur une même ressource sont
+        fusionnées pour n'exécuter qu'une requête par type de ressource.
+
+        Args:
+            items: Liste des demandes
+
+        Returns:
+            Résultats dans l'ordre des demandes
+
+        Raises:
+            ValueError: Si le lot ou l'une des demandes est invalide
+        """
+        if not isinstance(items, list) or not items:
+            raise ValueError("Aucune demande fournie")
+        if len(items) > MAX_BATCH_SIZE:
+            raise ValueError(f"Trop de demandes dans le lot (maximum {MAX_BATCH_SIZE})")
+        requests = [self._validate(item) for item in items]
+
+        # Regrouper les clés par ressource
+        pending: Dict[str, Dict[str, Any]] = {}
+        for req in requests:
+            entry = pending.setdefault(req['resource'], {'keys': set(), 'all': False, 'limit': 0})
+            if req['ids'] is None:
+                entry['all'] = True
+            else:
+                entry['keys'].update(req['ids'])
+            entry['limit'] = max(entry['limit'], req['limit'])
+
+        loaded = {
+            resource: self._load(resource, None if entry['all'] else sorted(entry['keys']), entry['limit'])
+            for resource, entry in pending.items()
+        }
+
+        results = []
+        for req in requests:
+            resource = req['resource']
+            unique = _RESOURCES[resource][3]
+            grouped = loaded[resource]
+            if req['ids'] is None:
+                data: Any = [serialize(obj, req['fields']) for objs in grouped.values() for obj in objs]
+            elif unique:
+                data = [serialize(grouped[key][0], req['fields']) for key in req['ids'] if key in grouped]
+            else:
+                limit = req['limit'] if resource == 'recent_games' else None
+                data = {
+                    str(key): [serialize(obj, req['fields']) for obj in grouped.get(key, [])[:limit]]
+                    for key in req['ids']
+                }
+            results.append({'resource': resource, 'data': data})
+        return results
@@ -112,6 +112,63 @@ CREATE TABLE IF NOT EXISTS quarter_profiles (
     UNIQUE(team_id, quarter)
 );
 
+-- Table des profils par quart-temps par saison (recalcul historique)
+CREATE TABLE IF NOT EXISTS season_quarter_profiles (
+    id INTEGER PRIMARY KEY,
+    team_id INTEGER NOT NULL,
+    season TEXT NOT NULL,
+    quarter INTEGER NOT NULL, -- 1-4
+    games_played INTEGER NOT NULL,
+    avg_points_for REAL NOT NULL,
+    avg_points_against REAL NOT NULL,
+    std_points_for REAL NOT NULL,
+    std_points_against REAL NOT NULL,
+    win_percentage REAL NOT NULL,
+    last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (team_id) REFERENCES teams (id),
+    UNIQUE(team_id, season, quarter)
+);
+
+-- Table des badges obtenus par saison (recalcul historique)
+CREATE TABLE IF NOT EXISTS season_team_badges (
+    id INTEGER PRIMARY KEY,
+    team_id INTEGER NOT NULL,
+    season TEXT NOT NULL,
+    badge_code TEXT NOT NULL,
+    justification TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (team_id) REFERENCES teams (id),
+    FOREIGN KEY (badge_code) REFERENCES badge_definitions (code),
+    UNIQUE(team_id, season, badge_code)
+);
+
+-- Table des backtests de prédictions par saison
+CREATE TABLE IF NOT EXISTS season_prediction_backtests (
+    season TEXT PRIMARY KEY,
+    predictions INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    accuracy REAL,
+    brier_score REAL,
+    last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Index des marges cumulées par match et par équipe
+CREATE TABLE IF NOT EXISTS team_game_margins (
+    team_id INTEGER NOT NULL,
+    game_id INTEGER NOT NULL,
+    opponent_id INTEGER NOT NULL,
+    is_home BOOLEAN NOT NULL,
+    season TEXT,
+    date TIMESTAMP NOT NULL,
+    period_margins TEXT NOT NULL, -- tableau JSON des marges cumulées en fin de période
+    final_margin INTEGER NOT NULL,
+    max_lead INTEGER NOT NULL,
+    max_deficit INTEGER NOT NULL,
+    PRIMARY KEY (team_id, game_id),
+    FOREIGN KEY (team_id) REFERENCES teams (id),
+    FOREIGN KEY (game_id) REFERENCES games (id)
+);
+
 -- Table de cache des données API
 CREATE TABLE IF NOT EXISTS api_cache (
     id INTEGER PRIMARY KEY,
@@ -119,7 +176,19 @@ CREATE TABLE IF NOT EXISTS api_cache (
     parameters TEXT NOT NULL,
     response TEXT NOT NULL,
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    expiry TIMESTAMP NOT NULL
+    expiry TIMESTAMP NOT NULL,
+    etag TEXT, -- validateur ETag renvoyé par l'API
+    last_modified TEXT, -- validateur Last-Modified renvoyé par l'API
+    content_hash TEXT -- empreinte SHA-256 du contenu de la réponse
+);
+
+-- Table des empreintes des données ingérées (signal de changement par match)
+CREATE TABLE IF NOT EXISTS ingestion_hashes (
+    resource TEXT NOT NULL, -- 'game', 'game_details', 'game_statistics'
+    resource_id INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (resource, resource_id)
 );
 
 -- Table des statistiques d'équipe par match
@@ -170,8 +239,108 @@ INSERT OR IGNORE INTO badge_definitions (code, name, description, category, pers
 -- Création d'index pour améliorer les performances
 CREATE INDEX IF NOT EXISTS idx_games_date ON games (date);
 CREATE INDEX IF NOT EXISTS idx_games_teams ON games (home_team_id, away_team_id);
+CREATE INDEX IF NOT EXISTS idx_games_away_team ON games (away_team_id);
 CREATE INDEX IF NOT EXISTS idx_game_quarters_game ON game_quarters (game_id);
 CREATE INDEX IF NOT EXISTS idx_team_badges_team ON team_badges (team_id);
 CREATE INDEX IF NOT EXISTS idx_predictions_game ON predictions (game_id);
 CREATE INDEX IF NOT EXISTS idx_quarter_profiles_team ON quarter_profiles (team_id);
+CREATE INDEX IF NOT EXISTS idx_games_season ON games (season);
+CREATE INDEX IF NOT EXISTS idx_season_quarter_profiles_season ON season_quarter_profiles (season, team_id);
+CREATE INDEX IF NOT EXISTS idx_season_team_badges_season ON season_team_badges (season, team_id);
+CREATE INDEX IF NOT EXISTS idx_team_game_margins_deficit ON team_game_margins (team_id, max_deficit, final_margin);
+CREATE INDEX IF NOT EXISTS idx_team_game_margins_final ON team_game_margins (team_id, final_margin);
 CREATE INDEX IF NOT EXISTS idx_api_cache_endpoint ON api_cache (endpoint, parameters);
+
+-- Calcul des marges cumulées à partir de games / game_quarters (source de team_game_margins).
+-- Un filtre sur game_id est propagé jusqu'à game_quarters (partition des fenêtres).
+CREATE VIEW IF NOT EXISTS team_game_margins_source AS
+SELECT g.home_team_id AS team_id, m.game_id, g.away_team_id AS opponent_id, 1 AS is_home,
+       g.season, g.date, m.home_margins AS period_margins, m.final_margin,
+       m.home_lead AS max_lead, m.away_lead AS max_deficit
+FROM (
+    SELECT game_id, home_margins, away_margins, final_margin,
+           MAX(max_margin, 0) AS home_lead, MAX(-min_margin, 0) AS away_lead
+    FROM (
+        SELECT game_id,
+               json_group_array(margin) OVER periods AS home_margins,
+               json_group_array(-margin) OVER periods AS away_margins,
+               SUM(delta) OVER periods AS final_margin,
+               MAX(margin) OVER periods AS max_margin,
+               MIN(margin) OVER periods AS min_margin,
+               ROW_NUMBER() OVER (PARTITION BY game_id ORDER BY quarter DESC) AS period_rank
+        FROM (
+            SELECT game_id, quarter, home_score - away_score AS delta,
+                   SUM(home_score - away_score) OVER (PARTITION BY game_id ORDER BY quarter) AS margin
+            FROM game_quarters
+        )
+        WINDOW periods AS (PARTITION BY game_id ORDER BY quarter
+                           ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+    )
+    WHERE period_rank = 1
+) m
+JOIN games g ON g.id = m.game_id
+WHERE g.status = 'finished'
+UNION ALL
+SELECT g.away_team_id, m.game_id, g.home_team_id, 0,
+       g.season, g.date, m.away_margins, -m.final_margin,
+       m.away_lead, m.home_lead
+FROM (
+    SELECT game_id, home_margins, away_margins, final_margin,
+           MAX(max_margin, 0) AS home_lead, MAX(-min_margin, 0) AS away_lead
+    FROM (
+        SELECT game_id,
+               json_group_array(margin) OVER periods AS home_margins,
+               json_group_array(-margin) OVER periods AS away_margins,
+               SUM(delta) OVER periods AS final_margin,
+               MAX(margin) OVER periods AS max_margin,
+               MIN(margin) OVER periods AS min_margin,
+               ROW_NUMBER() OVER (PARTITION BY game_id ORDER BY quarter DESC) AS period_rank
+        FROM (
+            SELECT game_id, quarter, home_score - away_score AS delta,
+                   SUM(home_score - away_score) OVER (PARTITION BY game_id ORDER BY quarter) AS margin
+            FROM game_quarters
+        )
+        WINDOW periods AS (PARTITION BY game_id ORDER BY quarter
+                           ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+    )
+    WHERE period_rank = 1
+) m
+JOIN games g ON g.id = m.game_id
+WHERE g.status = 'finished';
+
+-- Maintien de team_game_margins à chaque écriture de games / game_quarters
+CREATE TRIGGER IF NOT EXISTS trg_game_quarters_insert_margins AFTER INSERT ON game_quarters
+BEGIN
+    DELETE FROM team_game_margins WHERE game_id = NEW.game_id;
+    INSERT INTO team_game_margins SELECT * FROM team_game_margins_source WHERE game_id = NEW.game_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_game_quarters_update_margins AFTER UPDATE ON game_quarters
+BEGIN
+    DELETE FROM team_game_margins WHERE game_id IN (OLD.game_id, NEW.game_id);
+    INSERT INTO team_game_margins SELECT * FROM team_game_margins_source WHERE game_id IN (OLD.game_id, NEW.game_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_game_quarters_delete_margins AFTER DELETE ON game_quarters
+BEGIN
+    DELETE FROM team_game_margins WHERE game_id = OLD.game_id;
+    INSERT INTO team_game_margins SELECT * FROM team_game_margins_source WHERE game_id = OLD.game_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_games_insert_margins AFTER INSERT ON games
+BEGIN
+    DELETE FROM team_game_margins WHERE game_id = NEW.id;
+    INSERT INTO team_game_margins SELECT * FROM team_game_margins_source WHERE game_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_games_update_margins
+AFTER UPDATE OF id, status, home_team_id, away_team_id, season, date ON games
+BEGIN
+    DELETE FROM team_game_margins WHERE game_id IN (OLD.id, NEW.id);
+    INSERT INTO team_game_margins SELECT * FROM team_game_margins_source WHERE game_id IN (OLD.id, NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_games_delete_margins BEFORE DELETE ON games
+BEGIN
+    DELETE FROM team_game_margins WHERE game_id = OLD.id;
+END;
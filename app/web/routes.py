@@ -9,6 +9,7 @@ from datetime import datetime
 from app.data.database import get_db_connection
 from app.api.client import get_api_client
 from app.analysis.badges import BadgeManager
+from app.data.batch import BatchResolver
 
 # Création du blueprint pour les routes principales
 main_bp = Blueprint('main', __name__)
@@ -243,6 +244,52 @@ def compare_teams():
     
     return jsonify(comparison)
 
+@main_bp.route('/api/batch', methods=['POST'])
+def api_batch():
+    """Endpoint API résolvant plusieurs demandes de ressources en un seul appel.
+    
+    Corps attendu : {"requests": [{"resource": "teams", "ids": [1, 2], "fields": [...]}, ...]}
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or 'requests' not in data:
+        return jsonify({"error": "Paramètres manquants"}), 400
+    
+    db = get_db_connection()
+    conn = db._get_connection()
+    try:
+        results = BatchResolver(conn).resolve(data['requests'])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        conn.close()
+    
+    return jsonify({"results": results})
+
+@main_bp.route('/api/<resource>')
+def api_resource(resource):
+    """Endpoint API en lecture seule pour une ressource (ids, fields et limit en paramètres)."""
+    item = {"resource": resource}
+    try:
+        if request.args.get('ids'):
+            item['ids'] = [int(value) for value in request.args['ids'].split(',')]
+        if request.args.get('fields'):
+            item['fields'] = request.args['fields'].split(',')
+        if request.args.get('limit'):
+            item['limit'] = int(request.args['limit'])
+    except ValueError:
+        return jsonify({"error": "Paramètres invalides"}), 400
+    
+    db = get_db_connection()
+    conn = db._get_connection()
+    try:
+        result = BatchResolver(conn).resolve([item])[0]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        conn.close()
+    
+    return jsonify(result)
+
 @main_bp.route('/badges')
 def badges():
     """Page des badges de performance."""